@@ -1,17 +1,30 @@
 from __future__ import annotations  # FastAPI server exposing competency analysis
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from jd_analysis import CompetencyMatrix, JobProfile, analyze_with_config
-from llm_gateway import LlmGatewayError
+from jd_analysis import CompetencyMatrix, JobProfile, aanalyze_with_config, warmup
+from llm_gateway import LlmGatewayError, LlmPromptTooLarge, create_async_client
 
 CONFIG_PATH = Path(__file__).resolve().parent / "app_config.json"
 
-app = FastAPI(title="JD Analysis API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:  # Own the pooled LLM client for the app's lifetime
+    warmup(config_path=CONFIG_PATH)
+    app.state.llm_client = create_async_client()
+    try:
+        yield
+    finally:
+        await app.state.llm_client.aclose()
+
+
+app = FastAPI(title="JD Analysis API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,14 +41,16 @@ class AnalyzeRequest(BaseModel):  # Request payload from UI
 
 
 @app.post("/api/competency-matrix", response_model=CompetencyMatrix)
-def create_competency_matrix(payload: AnalyzeRequest) -> CompetencyMatrix:  # Generate competency matrix response
+async def create_competency_matrix(payload: AnalyzeRequest, request: Request) -> CompetencyMatrix:  # Generate competency matrix without holding a worker thread
     profile = JobProfile(
         job_title=payload.jobTitle,
         job_description=payload.jobDescription,
         experience_years=payload.experienceYears
     )
     try:
-        return analyze_with_config(profile, config_path=CONFIG_PATH)
+        return await aanalyze_with_config(profile, config_path=CONFIG_PATH, client=request.app.state.llm_client)
+    except LlmPromptTooLarge as exc:
+        raise HTTPException(status_code=413, detail="Job description is too long to analyze") from exc
     except LlmGatewayError as exc:
         raise HTTPException(status_code=502, detail="LLM request failed") from exc
     except Exception as exc:  # noqa: BLE001
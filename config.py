@@ -13,8 +13,12 @@ class LlmRoute(BaseModel):  # LLM endpoint configuration
     model: str
     timeout_s: float = Field(ge=0.1)
     max_retries: int = Field(default=2, ge=0)
+    cache_size: int = Field(default=0, ge=0)
+    max_prompt_chars: int | None = Field(default=None, ge=1)
     api_key_env: str | None = None
     response_format: str | None = None
+    prompt_cache: bool = False
+    schema_in_prompt: bool = True
     extra_headers: Dict[str, str] = Field(default_factory=dict)
 
 
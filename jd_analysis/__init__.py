@@ -4,14 +4,22 @@ from .jd_analysis import (  # noqa: F401 F403
     CompetencyArea,
     CompetencyMatrix,
     JobProfile,
+    aanalyze_with_config,
+    agenerate_competency_matrix,
     analyze_with_config,
+    generate_competency_matrices,
     generate_competency_matrix,
+    warmup,
 )
 
 __all__ = [
     "CompetencyArea",
     "CompetencyMatrix",
     "JobProfile",
+    "aanalyze_with_config",
+    "agenerate_competency_matrix",
     "analyze_with_config",
+    "generate_competency_matrices",
     "generate_competency_matrix",
+    "warmup",
 ]
@@ -1,13 +1,15 @@
 from __future__ import annotations  # Job description competency analysis module
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from textwrap import dedent
-from typing import List
+from typing import List, Optional, Sequence
 
 from pydantic import BaseModel, Field
 
 from config import LlmRoute, load_app_registry
-from llm_gateway import call
+from llm_gateway import AsyncHttpClient, acall, call, warmup as gateway_warmup
 
 
 class JobProfile(BaseModel):  # Input profile from UI
@@ -28,35 +30,74 @@ class CompetencyMatrix(BaseModel):  # Output competency matrix for UI
     competency_areas: List[CompetencyArea] = Field(min_length=5)
 
 
+_REGISTRY_KEY = "jd_analysis.generate_competency_matrix"
+
+_TASK_TEMPLATE = dedent(  # Dedented once at import; only job fields are substituted per call
+    """
+    Analyze the job description and identify competency areas for interviewer focus.
+
+    Respond with a JSON object following this contract:
+    - job_title: copy of the provided title.
+    - experience_years: copy of the provided experience range.
+    - competency_areas: array with at least five items.
+        Each item must contain:
+          - name: concise competency area name.
+          - summary: two-sentence overview of why this competency matters.
+          - skills: list of three to six concrete skills, written as short phrases.
+    Return only JSON without markdown fences, text, or commentary.
+
+    Job title: {job_title}
+    Required years of experience: {experience_years}
+    Job description:
+    {job_description}
+    """
+).strip()
+
+
 def generate_competency_matrix(profile: JobProfile, *, route: LlmRoute) -> CompetencyMatrix:  # Analyze JD via LLM
     task = _build_task(profile)
     result = call(task, CompetencyMatrix, cfg=route)
     return result
 
 
+async def agenerate_competency_matrix(profile: JobProfile, *, route: LlmRoute, client: Optional[AsyncHttpClient] = None) -> CompetencyMatrix:  # Analyze JD via async LLM gateway
+    return await acall(_build_task(profile), CompetencyMatrix, cfg=route, client=client)
+
+
+def generate_competency_matrices(profiles: Sequence[JobProfile], *, route: LlmRoute, max_concurrency: int = 4) -> List[CompetencyMatrix]:  # Analyze several JDs concurrently, preserving input order
+    if len(profiles) <= 1 or max_concurrency <= 1:
+        return [generate_competency_matrix(profile, route=route) for profile in profiles]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(profiles))) as pool:  # LLM calls are network-bound so threads overlap them
+        return list(pool.map(lambda profile: generate_competency_matrix(profile, route=route), profiles))
+
+
 def analyze_with_config(profile: JobProfile, *, config_path: Path) -> CompetencyMatrix:  # Convenience helper using app config
-    registry = load_app_registry(config_path, {"jd_analysis.generate_competency_matrix": CompetencyMatrix})
-    route, _ = registry["jd_analysis.generate_competency_matrix"]
-    return generate_competency_matrix(profile, route=route)
-
-
-def _build_task(profile: JobProfile) -> str:  # Build task prompt for LLM
-    return dedent(
-        f"""
-        Analyze the job description and identify competency areas for interviewer focus.
-        Job title: {profile.job_title}
-        Required years of experience: {profile.experience_years}
-        Job description:
-        {profile.job_description}
-
-        Respond with a JSON object following this contract:
-        - job_title: copy of the provided title.
-        - experience_years: copy of the provided experience range.
-        - competency_areas: array with at least five items.
-            Each item must contain:
-              - name: concise competency area name.
-              - summary: two-sentence overview of why this competency matters.
-              - skills: list of three to six concrete skills, written as short phrases.
-        Return only JSON without markdown fences, text, or commentary.
-        """
-    ).strip()
+    return generate_competency_matrix(profile, route=_route_for(config_path))
+
+
+async def aanalyze_with_config(profile: JobProfile, *, config_path: Path, client: Optional[AsyncHttpClient] = None) -> CompetencyMatrix:  # Async helper using app config
+    return await agenerate_competency_matrix(profile, route=_route_for(config_path), client=client)
+
+
+def warmup(*, config_path: Path) -> None:  # Load route and prime gateway caches at service startup
+    gateway_warmup(CompetencyMatrix, cfg=_route_for(config_path))
+
+
+def _route_for(config_path: Path) -> LlmRoute:  # Resolve route, re-reading config only when the file changes
+    path = config_path.resolve()
+    return _load_route(str(path), path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _load_route(path: str, mtime_ns: int) -> LlmRoute:  # Parse config once per (path, mtime)
+    registry = load_app_registry(Path(path), {_REGISTRY_KEY: CompetencyMatrix})
+    route, _ = registry[_REGISTRY_KEY]
+    return route
+
+
+def _build_task(profile: JobProfile) -> str:  # Build task prompt for LLM; static contract first so providers can cache the prefix
+    return _TASK_TEMPLATE.format(
+        job_title=profile.job_title,
+        experience_years=profile.experience_years,
+        job_description=profile.job_description,
+    )
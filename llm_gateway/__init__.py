@@ -1,5 +1,5 @@
 from __future__ import annotations  # Re-export llm_gateway public API
 
-from .llm_gateway import HttpClient, HttpResponse, LlmGatewayError, call
+from .llm_gateway import AsyncHttpClient, HttpClient, HttpResponse, LlmGatewayError, LlmPromptTooLarge, acall, call, close, create_async_client, warmup
 
-__all__ = ["HttpClient", "HttpResponse", "LlmGatewayError", "call"]
+__all__ = ["AsyncHttpClient", "HttpClient", "HttpResponse", "LlmGatewayError", "LlmPromptTooLarge", "acall", "call", "close", "create_async_client", "warmup"]
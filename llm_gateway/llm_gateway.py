@@ -1,9 +1,13 @@
 from __future__ import annotations  # LLM request gateway module
 
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Callable, Dict, Optional, Protocol, Tuple, Type, TypeVar
+from collections import OrderedDict
+from functools import cache, lru_cache
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Protocol, Tuple, Type, TypeVar
 
 from pydantic import BaseModel, ValidationError
 
@@ -17,6 +21,10 @@ class HttpClient(Protocol):  # Minimal HTTP client protocol
     def post(self, url: str, *, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> "HttpResponse": ...
 
 
+class AsyncHttpClient(Protocol):  # Minimal async HTTP client protocol
+    async def post(self, url: str, *, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> "HttpResponse": ...
+
+
 class HttpResponse(Protocol):  # Minimal HTTP response protocol
     @property
     def status_code(self) -> int: ...
@@ -31,72 +39,206 @@ class LlmGatewayError(RuntimeError):  # Base gateway error
     pass
 
 
+class LlmPromptTooLarge(LlmGatewayError):  # Prompt exceeds route budget; raised before any request is sent
+    pass
+
+
 T = TypeVar("T", bound=BaseModel)
 
+_JSON_HINT = {"type": "text", "text": "Reply with a single JSON object matching this schema."}  # Static prompt parts built once at import
+_CONSTRAINED_HINT = {"type": "text", "text": "Reply with a single JSON object matching the response schema."}
+_REPAIR_MESSAGE = {
+    "role": "system",
+    "content": [{"type": "text", "text": "The previous reply failed validation. Return valid JSON only."}],
+}
+
+
+class _ResponseCache:  # Thread-safe LRU of validated LLM outputs for one route
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, BaseModel] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[BaseModel]:  # Return cached output and mark as recently used
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: Hashable, value: BaseModel) -> None:  # Store output and evict oldest beyond maxsize
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+_CACHES: Dict[str, _ResponseCache] = {}  # One LRU per route so routes cannot evict each other
+_CACHES_LOCK = Lock()
+_MAX_CONNECTIONS = 64
+_MAX_KEEPALIVE = 32
+_SYNC_CLIENT: Optional[Any] = None
+_SYNC_CLIENT_LOCK = Lock()
+
 
 def call(task: str, schema: Type[T], *, cfg: LlmRoute, client: Optional[HttpClient] = None) -> T:  # Invoke configured LLM route and validate output
-    schema_json = json.dumps(schema.model_json_schema(), indent=2)
-    base_messages = [
-        {
-            "role": "system",
-            "content": [
-                {"type": "text", "text": "Reply with a single JSON object matching this schema."},
-                {"type": "text", "text": schema_json},
-            ],
-        },
-        {"role": "user", "content": [{"type": "text", "text": task}]},
-    ]
-    attempts = cfg.max_retries + 1
+    key = _precheck(task, schema, cfg)
+    cached = _cache_lookup(key, cfg)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+    result = _call_uncached(task, schema, cfg, client)
+    _cache_store(key, result, cfg)
+    return result
+
+
+async def acall(task: str, schema: Type[T], *, cfg: LlmRoute, client: Optional[AsyncHttpClient] = None) -> T:  # Async variant of call for event-loop callers
+    key = _precheck(task, schema, cfg)
+    cached = _cache_lookup(key, cfg)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+    result = await _acall_uncached(task, schema, cfg, client)
+    _cache_store(key, result, cfg)
+    return result
+
+
+def _precheck(task: str, schema: Type[BaseModel], cfg: LlmRoute) -> Optional[Hashable]:  # Enforce prompt budget and derive cache key
+    if cfg.max_prompt_chars is not None and len(task) > cfg.max_prompt_chars:
+        raise LlmPromptTooLarge(f"Prompt has {len(task)} chars; route '{cfg.name}' allows {cfg.max_prompt_chars}")
+    return _cache_key(task, schema, cfg) if cfg.cache_size else None
+
+
+def _cache_key(task: str, schema: Type[BaseModel], cfg: LlmRoute) -> Hashable:  # Exact-match key over route, schema and prompt
+    digest = hashlib.blake2b(task.encode("utf-8"), digest_size=16).digest()
+    return cfg.name, cfg.model, cfg.base_url, f"{schema.__module__}.{schema.__qualname__}", digest
+
+
+def _route_cache(cfg: LlmRoute) -> _ResponseCache:  # Per-route LRU, resized when the route's cache_size changes
+    with _CACHES_LOCK:
+        route_cache = _CACHES.get(cfg.name)
+        if route_cache is None:
+            route_cache = _CACHES[cfg.name] = _ResponseCache(cfg.cache_size)
+        route_cache.maxsize = cfg.cache_size
+        return route_cache
+
+
+def _cache_lookup(key: Optional[Hashable], cfg: LlmRoute) -> Optional[BaseModel]:  # Deep copy of cached output so callers cannot mutate the entry
+    cached = _route_cache(cfg).get(key) if key is not None else None
+    return cached.model_copy(deep=True) if cached is not None else None
+
+
+def _cache_store(key: Optional[Hashable], result: BaseModel, cfg: LlmRoute) -> None:  # Remember validated output when caching is enabled
+    if key is not None:
+        _route_cache(cfg).put(key, result.model_copy(deep=True))
+
+
+def _call_uncached(task: str, schema: Type[T], cfg: LlmRoute, client: Optional[HttpClient]) -> T:  # Run request/validate/retry loop
+    request = _prepare(task, schema, cfg)
     last_error: Optional[Exception] = None
-    for attempt in range(attempts):
-        messages = list(base_messages)
-        if attempt > 0:
-            messages.append(
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "The previous reply failed validation. Return valid JSON only.",
-                        }
-                    ],
-                }
-            )
-        payload: Dict[str, Any] = {"model": cfg.model, "messages": messages}
-        if cfg.response_format:
-            payload["response_format"] = {"type": cfg.response_format}
-        headers = {"Content-Type": "application/json"}
-        if cfg.api_key_env:
-            api_key = os.getenv(cfg.api_key_env)
-            if api_key:
-                headers["Authorization"] = f"Bearer {api_key}"
-        headers.update(cfg.extra_headers)
+    for attempt in range(cfg.max_retries + 1):
         try:
-            response, close_cb = _post(f"{cfg.base_url}{cfg.endpoint}", payload, headers, cfg.timeout_s, client)
+            response, close_cb = _post(request.url, _payload(request, attempt), request.headers, request.timeout, client)
         except Exception as exc:  # noqa: BLE001
-            logger.error("LLM transport failure: %s", exc)
-            raise LlmGatewayError("LLM transport failed") from exc
-        if response.status_code >= 400:
-            logger.error("LLM error status: %s", response.status_code)
-            raise LlmGatewayError(f"LLM returned status {response.status_code}")
+            raise _transport_error(exc) from exc
         try:
-            data = response.json()
+            return _parse(response, schema)
+        except (json.JSONDecodeError, ValidationError) as exc:
+            logger.warning("LLM output validation failed: %s", exc)
+            last_error = exc
+        finally:
+            _close_safely(close_cb)
+    raise LlmGatewayError("LLM output validation failed") from last_error
+
+
+async def _acall_uncached(task: str, schema: Type[T], cfg: LlmRoute, client: Optional[AsyncHttpClient]) -> T:  # Async request/validate/retry loop
+    request = _prepare(task, schema, cfg)
+    last_error: Optional[Exception] = None
+    for attempt in range(cfg.max_retries + 1):
+        try:
+            response = await _apost(request.url, _payload(request, attempt), request.headers, request.timeout, client)
         except Exception as exc:  # noqa: BLE001
-            logger.error("Invalid JSON payload from LLM: %s", exc)
-            raise LlmGatewayError("LLM payload was not JSON") from exc
-        content = _extract_content(data)
+            raise _transport_error(exc) from exc
         try:
-            parsed = _validate(schema, content)
-            _close_safely(close_cb)
-            return parsed
+            return _parse(response, schema)
         except (json.JSONDecodeError, ValidationError) as exc:
             logger.warning("LLM output validation failed: %s", exc)
             last_error = exc
-            _close_safely(close_cb)
-            continue
     raise LlmGatewayError("LLM output validation failed") from last_error
 
 
+class _Request(NamedTuple):  # Loop-invariant request parts resolved once per call
+    url: str
+    headers: Dict[str, str]
+    messages: List[Dict[str, Any]]
+    model: str
+    response_format: Optional[Dict[str, Any]]
+    timeout: float
+
+
+def _prepare(task: str, schema: Type[BaseModel], cfg: LlmRoute) -> _Request:  # Resolve route fields before the retry loop
+    messages = [
+        _system_message(schema, cfg.prompt_cache, cfg.schema_in_prompt or cfg.response_format != "json_schema"),
+        {"role": "user", "content": [{"type": "text", "text": task}]},
+    ]
+    response_format = _response_format(schema, cfg.response_format) if cfg.response_format else None
+    return _Request(f"{cfg.base_url}{cfg.endpoint}", _build_headers(cfg), messages, cfg.model, response_format, cfg.timeout_s)
+
+
+def _payload(request: _Request, attempt: int) -> Dict[str, Any]:  # Request body for attempt; retries append repair hint
+    messages = request.messages if attempt == 0 else [*request.messages, _REPAIR_MESSAGE]
+    payload: Dict[str, Any] = {"model": request.model, "messages": messages}
+    if request.response_format:
+        payload["response_format"] = request.response_format
+    return payload
+
+
+def _transport_error(exc: Exception) -> LlmGatewayError:  # Log and wrap transport failure
+    logger.error("LLM transport failure: %s", exc)
+    return LlmGatewayError("LLM transport failed")
+
+
+def _parse(response: HttpResponse, schema: Type[T]) -> T:  # Check status and validate content; schema errors propagate for retry
+    if response.status_code >= 400:
+        logger.error("LLM error status: %s", response.status_code)
+        raise LlmGatewayError(f"LLM returned status {response.status_code}")
+    try:
+        data = response.json()
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Invalid JSON payload from LLM: %s", exc)
+        raise LlmGatewayError("LLM payload was not JSON") from exc
+    return _validate(schema, _extract_content(data))
+
+
+@lru_cache(maxsize=64)
+def _schema_json(schema: Type[BaseModel]) -> str:  # Serialize output schema once per model class
+    return json.dumps(schema.model_json_schema(), indent=2)
+
+
+@lru_cache(maxsize=128)
+def _system_message(schema: Type[BaseModel], prompt_cache: bool, embed_schema: bool) -> Dict[str, Any]:  # Static system prefix shared by every call for schema
+    blocks: List[Dict[str, Any]] = [_JSON_HINT, {"type": "text", "text": _schema_json(schema)}] if embed_schema else [_CONSTRAINED_HINT]  # Opted-out json_schema routes rely on response_format alone
+    if prompt_cache:
+        blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}  # Provider caches everything up to this block
+    return {"role": "system", "content": blocks}
+
+
+@lru_cache(maxsize=128)
+def _response_format(schema: Type[BaseModel], kind: str) -> Dict[str, Any]:  # Provider response_format, schema-constrained for json_schema
+    if kind == "json_schema":
+        return {"type": kind, "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()}}
+    return {"type": kind}
+
+
+def _build_headers(cfg: LlmRoute) -> Dict[str, str]:  # Assemble request headers for route
+    headers = {"Content-Type": "application/json"}
+    if cfg.api_key_env:
+        api_key = os.getenv(cfg.api_key_env)
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+    headers.update(cfg.extra_headers)
+    return headers
+
+
 def _post(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float, client: Optional[HttpClient]) -> Tuple[HttpResponse, Optional[Callable[[], None]]]:  # Dispatch HTTP request
     if client is not None:
         response = client.post(url, json=payload, headers=headers, timeout=timeout)
@@ -104,13 +246,52 @@ def _post(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: f
         if callable(close_cb):
             return response, close_cb
         return response, None
+    response = _shared_client().post(url, json=payload, headers=headers, timeout=timeout)
+    return response, None
+
+
+async def _apost(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float, client: Optional[AsyncHttpClient]) -> HttpResponse:  # Dispatch async HTTP request
+    if client is not None:
+        return await client.post(url, json=payload, headers=headers, timeout=timeout)
+    async with _httpx().AsyncClient() as http_client:  # Unpooled fallback; long-lived callers inject a create_async_client() instance
+        return await http_client.post(url, json=payload, headers=headers, timeout=timeout)
+
+
+@cache
+def _httpx() -> Any:  # Resolve optional httpx dependency once
     try:
         import httpx  # type: ignore
     except ImportError as exc:  # noqa: F401
         raise LlmGatewayError("httpx is required for default transport") from exc
-    http_client = httpx.Client(timeout=timeout)
-    response = http_client.post(url, json=payload, headers=headers)
-    return response, http_client.close
+    return httpx
+
+
+def _pool_limits() -> Any:  # Keep-alive pool sizing shared by sync and async transports
+    return _httpx().Limits(max_connections=_MAX_CONNECTIONS, max_keepalive_connections=_MAX_KEEPALIVE)
+
+
+def _shared_client() -> Any:  # Process-wide keep-alive client; httpx.Client is thread-safe
+    global _SYNC_CLIENT
+    with _SYNC_CLIENT_LOCK:  # Serialise first use so concurrent workers cannot each build a client
+        if _SYNC_CLIENT is None:
+            _SYNC_CLIENT = _httpx().Client(limits=_pool_limits())
+        return _SYNC_CLIENT
+
+
+def create_async_client() -> AsyncHttpClient:  # Keep-alive async client for the caller to own, pass to acall and aclose
+    return _httpx().AsyncClient(limits=_pool_limits())  # type: ignore[no-any-return]
+
+
+def warmup(schema: Type[BaseModel], *, cfg: LlmRoute) -> None:  # Prime schema and prompt caches so the first call skips setup
+    _prepare("", schema, cfg)
+
+
+def close() -> None:  # Release the shared sync pool; call on shutdown of sync callers
+    global _SYNC_CLIENT
+    with _SYNC_CLIENT_LOCK:
+        sync_client, _SYNC_CLIENT = _SYNC_CLIENT, None
+    if sync_client is not None:
+        sync_client.close()
 
 
 def _close_safely(close_cb: Optional[Callable[[], None]]) -> None:  # Close HTTP client callback when provided
@@ -0,0 +1,12 @@
+from __future__ import annotations  # API error mapping checks
+
+from fastapi.testclient import TestClient
+
+import api_server
+
+
+def test_oversized_job_description_returns_413() -> None:  # Prompt budget maps to 413, not the generic 502 gateway error
+    payload = {"jobTitle": "Engineer", "jobDescription": "x" * 50000, "experienceYears": "3-5"}
+    with TestClient(api_server.app) as client:
+        response = client.post("/api/competency-matrix", json=payload)
+    assert response.status_code == 413
@@ -0,0 +1,194 @@
+from __future__ import annotations  # LLM gateway checks
+
+import asyncio
+import gc
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+import pytest
+from pydantic import BaseModel
+
+from config import LlmRoute
+from llm_gateway import LlmGatewayError, LlmPromptTooLarge, acall, call
+from llm_gateway import llm_gateway as gateway
+
+
+class _Answer(BaseModel):  # Minimal output schema
+    value: str
+
+
+class _Response:  # Canned chat-completions response
+    status_code = 200
+    text = ""
+
+    def json(self) -> Any:  # Return valid schema payload
+        return {"choices": [{"message": {"content": json.dumps({"value": "ok"})}}]}
+
+
+class _Client:  # Recording fake transport
+    def __init__(self) -> None:
+        self.tasks: List[str] = []
+
+    def post(self, url: str, *, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> _Response:  # Record user task and reply
+        self.tasks.append(json["messages"][-1]["content"][0]["text"])
+        return _Response()
+
+
+class _Scripted:  # Response with configurable status and body
+    text = ""
+
+    def __init__(self, status_code: int, body: Any) -> None:
+        self.status_code, self.body = status_code, body
+
+    def json(self) -> Any:  # Return body or raise when it stands for a non-JSON reply
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+
+def _reply(content: str, status_code: int = 200) -> _Scripted:  # Chat-completions reply carrying content
+    return _Scripted(status_code, {"choices": [{"message": {"content": content}}]})
+
+
+class _AsyncClient:  # Fake AsyncHttpClient replaying scripted responses
+    def __init__(self, *responses: _Scripted) -> None:
+        self.responses = list(responses)
+        self.payloads: List[Dict[str, Any]] = []
+
+    async def post(self, url: str, *, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> _Scripted:  # Record payload and reply
+        self.payloads.append(json)
+        return self.responses.pop(0)
+
+
+class _ClosingClient:  # Sync fake transport that records close calls
+    def __init__(self, response: _Scripted) -> None:
+        self.response, self.closed = response, 0
+
+    def post(self, url: str, *, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> _Scripted:  # Reply with scripted response
+        return self.response
+
+    def close(self) -> None:  # Count transport releases
+        self.closed += 1
+
+
+def _route(name: str, cache_size: int) -> LlmRoute:  # Route with caching enabled
+    return LlmRoute(name=name, base_url="http://llm", endpoint="/v1", model="m", timeout_s=1.0, cache_size=cache_size)
+
+
+def test_route_caches_do_not_evict_each_other() -> None:  # Small route must not trim a larger route's entries
+    big, small, client = _route("cache_big", 64), _route("cache_small", 1), _Client()
+    for task in ("a", "b", "c"):
+        call(task, _Answer, cfg=big, client=client)
+    call("x", _Answer, cfg=small, client=client)
+    call("y", _Answer, cfg=small, client=client)
+    for task in ("a", "b", "c"):
+        call(task, _Answer, cfg=big, client=client)
+    call("x", _Answer, cfg=small, client=client)
+    assert client.tasks == ["a", "b", "c", "x", "y", "x"]
+
+
+def test_shared_client_built_once_across_threads(monkeypatch: pytest.MonkeyPatch) -> None:  # Concurrent first use yields a single pooled client
+    built: List[object] = []
+
+    class _Httpx:  # Slow constructor widens the race window
+        @staticmethod
+        def Limits(**_: Any) -> None:  # noqa: N802
+            return None
+
+        @staticmethod
+        def Client(**_: Any) -> object:  # noqa: N802
+            time.sleep(0.05)
+            built.append(object())
+            return built[-1]
+
+    monkeypatch.setattr(gateway, "_httpx", lambda: _Httpx)
+    monkeypatch.setattr(gateway, "_SYNC_CLIENT", None)
+    threads = [threading.Thread(target=gateway._shared_client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1 and gateway._shared_client() is built[0]
+
+
+class _Handler(BaseHTTPRequestHandler):  # Local chat-completions endpoint
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(_Response().json()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_: Any) -> None:  # Keep test output quiet
+        return None
+
+
+@pytest.fixture
+def llm_server() -> Iterator[str]:  # Serve canned replies on an ephemeral port
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_acall_retains_no_client_across_event_loops(llm_server: str) -> None:  # Default async transport must not outlive its loop
+    route = LlmRoute(name="async_loops", base_url=llm_server, endpoint="/v1", model="m", timeout_s=5.0)
+    for _ in range(2):
+        assert asyncio.run(acall("task", _Answer, cfg=route)).value == "ok"
+    gc.collect()
+    assert not [obj for obj in gc.get_objects() if isinstance(obj, httpx.AsyncClient) and not obj.is_closed]
+
+
+def test_acall_retries_with_repair_message() -> None:  # Invalid output triggers one repair-hinted retry
+    client = _AsyncClient(_reply("not json"), _reply(json.dumps({"value": "fixed"})))
+    result = asyncio.run(acall("task", _Answer, cfg=_route("async_retry", 0), client=client))
+    assert result.value == "fixed"
+    assert gateway._REPAIR_MESSAGE not in client.payloads[0]["messages"]
+    assert client.payloads[1]["messages"][-1] is gateway._REPAIR_MESSAGE
+
+
+def test_acall_error_status_fails_without_retry() -> None:  # HTTP errors are not retried as validation failures
+    client = _AsyncClient(_reply("{}", status_code=503), _reply(json.dumps({"value": "unused"})))
+    with pytest.raises(LlmGatewayError, match="status 503"):
+        asyncio.run(acall("task", _Answer, cfg=_route("async_status", 0), client=client))
+    assert len(client.payloads) == 1
+
+
+def test_acall_non_json_payload_fails() -> None:  # Undecodable response body surfaces as gateway error
+    client = _AsyncClient(_Scripted(200, ValueError("bad body")))
+    with pytest.raises(LlmGatewayError, match="not JSON"):
+        asyncio.run(acall("task", _Answer, cfg=_route("async_payload", 0), client=client))
+
+
+def test_call_closes_injected_client_on_error_status() -> None:  # Sync path releases the transport even when parsing raises
+    client = _ClosingClient(_reply("{}", status_code=500))
+    with pytest.raises(LlmGatewayError):
+        call("task", _Answer, cfg=_route("sync_close", 0), client=client)
+    assert client.closed == 1
+
+
+def test_call_rejects_oversized_prompt_before_posting() -> None:  # Budget check runs before any transport use
+    client = _Client()
+    route = LlmRoute(name="budget", base_url="http://llm", endpoint="/v1", model="m", timeout_s=1.0, max_prompt_chars=10)
+    with pytest.raises(LlmPromptTooLarge):
+        call("x" * 11, _Answer, cfg=route, client=client)
+    assert client.tasks == []
+
+
+@pytest.mark.parametrize("schema_in_prompt, embedded", [(True, True), (False, False)])
+def test_json_schema_route_embeds_schema_unless_opted_out(schema_in_prompt: bool, embedded: bool) -> None:  # Prompt copy of the schema is dropped only on explicit opt-out
+    client = _AsyncClient(_reply(json.dumps({"value": "ok"})))
+    route = LlmRoute(name=f"embed_{schema_in_prompt}", base_url="http://llm", endpoint="/v1", model="m", timeout_s=1.0, response_format="json_schema", schema_in_prompt=schema_in_prompt)
+    asyncio.run(acall("task", _Answer, cfg=route, client=client))
+    system_blocks = client.payloads[0]["messages"][0]["content"]
+    assert (gateway._schema_json(_Answer) in [block["text"] for block in system_blocks]) is embedded
+    assert client.payloads[0]["response_format"]["type"] == "json_schema"